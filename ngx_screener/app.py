@@ -4,26 +4,49 @@ import os
 
 # Configuration
 DATA_PATH = "data/ngx daily price list.csv"
+PARQUET_PATH = DATA_PATH.replace(".csv", ".parquet")
 
-@st.cache_data
-def load_data():
-    try:
-        if os.path.exists(DATA_PATH):
-            df = pd.read_csv(DATA_PATH)
-            return df
-        else:
-            st.error(f"Data file not found at: {DATA_PATH}")
-            return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return pd.DataFrame()
+# Compact dtypes for the columns the price list carries (ticker is COMPANY
+# from gti_parser, SYMBOL in older exports). A categorical ticker keeps the
+# frame small and lets comparisons and grouping work on integer codes.
+DATA_DTYPES = {
+    "COMPANY": "category",
+    "SYMBOL": "category",
+    "TRADES": "Int32",  # nullable, so a missing cell can't fail the load
+    # pyarrow infers ISO dates as datetime.date but leaves dd/mm dates and
+    # Parquet as text; keep DATE one string dtype whichever file is read
+    "DATE": "string",
+}
+
+def latest_data_path():
+    # Prefer the Parquet copy, but never over a CSV that changed after it
+    candidates = [path for path in (PARQUET_PATH, DATA_PATH) if os.path.exists(path)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+@st.cache_data(persist="disk")
+def load_data(source_path, data_mtime):
+    # data_mtime keys the on-disk cache so an updated price list is re-read.
+    # Errors propagate to the caller so a failed load is never cached.
+    if source_path.endswith(".parquet"):
+        df = pd.read_parquet(source_path)
+    else:
+        df = pd.read_csv(source_path, engine="pyarrow")
+    return df.astype({col: dtype for col, dtype in DATA_DTYPES.items() if col in df.columns})
 
 # Main app
 st.title("📊 NGX Stock Screener")
 st.markdown("*Nigerian Exchange Stock Analysis*")
 
 # Load data
-df = load_data()
+source_path = latest_data_path()
+df = pd.DataFrame()
+if source_path is None:
+    st.error(f"Data file not found at: {DATA_PATH}")
+else:
+    try:
+        df = load_data(source_path, os.path.getmtime(source_path))
+    except Exception as e:
+        st.error(f"Error loading data: {e}")
 
 if df.empty:
     st.warning("⚠️ No data available. Please check your data file.")
@@ -1,22 +1,113 @@
 import os
+import io
+import json
+import numpy as np
 import pandas as pd
 import fitz  # PyMuPDF
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
 import re
 
 PDF_FOLDER = r"C:\Users\ofoye\ngx_screener\data\daily_pdfs"
 MASTER_CSV = r"C:\Users\ofoye\ngx_screener\data\ngx daily price list.csv"
+MASTER_PARQUET = MASTER_CSV.replace(".csv", ".parquet")
+PDF_CACHE_DIR = os.path.join(os.path.dirname(MASTER_CSV), ".pdfcache")
+
+# Lines that look like a header, summary, footer, or document info
+SKIP_PATTERNS = ["COMPANY", "ASI", "GAINERS", "LOSERS", "TOTAL", "GTI SECURITIES",
+                 "Price List", "Tinubu Street", "P.O. BOX", "Tel:", "PCLOSE",
+                 "OPEN", "HIGH", "LOW", "CLOSE", "CHANGE", "%CHANGE", "TRADES",
+                 "VOLUME", "VALUE"]
+# Case-insensitive form, used to tell document text from unparsed tickers
+SKIP_PATTERNS_UPPER = [pattern.upper() for pattern in SKIP_PATTERNS]
+
+# A plain numeric cell: optional leading naira sign, optional sign, digits
+# with commas/underscores, at most one point and an optional exponent. It is
+# narrower than float() (no nan/inf, no trailing or spaced naira sign); rows
+# it misses make the fast path fall back to the resync loop.
+NUM_RE = re.compile(r"(?=[^eE]*\d)₦?[-+]?[\d,_]*\.?[\d,_]*(?:[eE][-+]?[\d_]+)?")
+
+# Numeric fields following each company line, in PDF column order
+RECORD_FIELDS = [("PCLOSE", np.float64), ("OPEN", np.float64), ("HIGH", np.float64),
+                 ("LOW", np.float64), ("CLOSE", np.float64), ("CHANGE", np.float64),
+                 ("%CHANGE", np.float64), ("TRADES", np.int64), ("VOLUME", np.int64),
+                 ("VALUE", np.float64)]
 
 def extract_text_from_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        text += page.get_text("text")
+    with fitz.open(pdf_path) as doc:
+        return "".join(page.get_text("text") for page in doc)
+
+def cached_text_from_pdf(pdf_path):
+    # Downloaded PDFs rarely change, so reuse the extracted text until the
+    # file's mtime moves
+    mtime = os.path.getmtime(pdf_path)
+    cache_path = os.path.join(PDF_CACHE_DIR, os.path.basename(pdf_path) + ".json")
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["mtime"] == mtime:
+            return cached["text"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    text = extract_text_from_pdf(pdf_path)
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"mtime": mtime, "text": text}, f)
     return text
 
+def _parse_records_vectorized(lines):
+    # Fast path: tag numeric lines with one compiled regex, locate every
+    # company line followed by ten numeric lines, then cast the whole numeric
+    # block in a single numpy conversion. Returns None when the block won't
+    # cast cleanly or any ticker line was passed over, so the caller falls
+    # back to the resync loop, which logs every skipped row.
+    if len(lines) < 11:
+        return None
+
+    numeric = np.fromiter(map(bool, map(NUM_RE.fullmatch, lines)), dtype=bool, count=len(lines))
+
+    # Count numeric lines in each 10-line window after a candidate start
+    counts = np.concatenate(([0], np.cumsum(numeric)))
+    starts = np.arange(len(lines) - 10)
+    run = counts[starts + 11] - counts[starts + 1]
+    starts = starts[~numeric[starts] & (run == 10)].tolist()
+    starts = [s for s in starts if not any(pattern in lines[s].upper() for pattern in SKIP_PATTERNS)]
+
+    if not starts:
+        return None
+
+    block = "\n".join("\n".join(lines[s + 1:s + 11]) for s in starts)
+    cells = block.replace(",", "").split("\n")
+    width = len(RECORD_FIELDS)
+
+    # Cast with the same rules as the loop below: float()/int() per column,
+    # so e.g. "1.0" is rejected for TRADES/VOLUME and "₦" only allowed in VALUE
+    columns = {"COMPANY": [lines[s] for s in starts]}
+    try:
+        for j, (name, dtype) in enumerate(RECORD_FIELDS):
+            col = cells[j::width]
+            if name == "VALUE":
+                col = [cell.replace("₦", "") for cell in col]
+            if dtype is np.int64:
+                col = list(map(int, col))
+            columns[name] = np.array(col, dtype=dtype)
+    except (ValueError, OverflowError):
+        return None
+
+    # Any text line outside every record, other than headers, footers and
+    # other document text, is a row the fast path couldn't take
+    covered = np.zeros(len(lines), dtype=bool)
+    covered[(np.asarray(starts)[:, None] + np.arange(11)).ravel()] = True
+    for i in np.flatnonzero(~covered & ~numeric).tolist():
+        if not any(pattern in lines[i].upper() for pattern in SKIP_PATTERNS_UPPER):
+            return None
+
+    return pd.DataFrame(columns)
+
 def parse_pdf_text(text):
     lines = [line.strip() for line in text.strip().split("\n") if line.strip()]
-    data = []
     
     # Find the header section
     header_keywords = ["COMPANY", "PCLOSE", "OPEN", "HIGH", "LOW", "CLOSE", "CHANGE", "%CHANGE", "TRADES", "VOLUME", "VALUE"]
@@ -38,22 +129,30 @@ def parse_pdf_text(text):
     
     print(f"📊 Data starts at line {data_start_idx + 1}")
     
+    records = _parse_records_vectorized(lines[data_start_idx:])
+    if records is not None:
+        print(f"✅ Parsed {len(records)} companies")
+        return records
+    
+    print("⚠️ Records not aligned — falling back to line-by-line parsing")
+    
     # Parse data in chunks of 11 (one for each column)
     i = data_start_idx
     skipped_companies = []
     
+    # Each record spans 11 lines, which bounds how many rows we can fill
+    capacity = (len(lines) - data_start_idx) // 11
+    columns = {"COMPANY": np.empty(capacity, dtype=object)}
+    columns.update({name: np.empty(capacity, dtype=dtype) for name, dtype in RECORD_FIELDS})
+    n = 0
+    
     while i < len(lines) - 10:  # Need at least 11 lines for a complete record
         try:
             # Extract 11 consecutive values
             company = lines[i].strip()
             
             # Skip if this looks like a header, summary, footer, or document info
-            skip_patterns = ["COMPANY", "ASI", "GAINERS", "LOSERS", "TOTAL", "GTI SECURITIES", 
-                           "Price List", "Tinubu Street", "P.O. BOX", "Tel:", "PCLOSE", 
-                           "OPEN", "HIGH", "LOW", "CLOSE", "CHANGE", "%CHANGE", "TRADES", 
-                           "VOLUME", "VALUE"]
-            
-            if any(pattern in company.upper() for pattern in skip_patterns):
+            if any(pattern in company.upper() for pattern in SKIP_PATTERNS):
                 i += 1
                 continue
             
@@ -64,7 +163,7 @@ def parse_pdf_text(text):
             # Validate that next 10 lines look like numeric data
             # Skip if any of the next few lines contain obvious text patterns
             next_lines = lines[i + 1:i + 11]
-            if any(any(pattern in line.upper() for pattern in skip_patterns) for line in next_lines[:3]):
+            if any(any(pattern in line.upper() for pattern in SKIP_PATTERNS) for line in next_lines[:3]):
                 print(f"⚠️ Skipping {company} - detected non-numeric data in following lines")
                 skipped_companies.append(company)
                 i += 1
@@ -81,24 +180,23 @@ def parse_pdf_text(text):
             volume = int(lines[i + 9].replace(",", ""))
             value = float(lines[i + 10].replace(",", "").replace("₦", ""))
             
-            data.append({
-                "COMPANY": company,
-                "PCLOSE": pclose,
-                "OPEN": open_price,
-                "HIGH": high,
-                "LOW": low,
-                "CLOSE": close,
-                "CHANGE": change,
-                "%CHANGE": pct_change,
-                "TRADES": trades,
-                "VOLUME": volume,
-                "VALUE": value
-            })
+            columns["COMPANY"][n] = company
+            columns["PCLOSE"][n] = pclose
+            columns["OPEN"][n] = open_price
+            columns["HIGH"][n] = high
+            columns["LOW"][n] = low
+            columns["CLOSE"][n] = close
+            columns["CHANGE"][n] = change
+            columns["%CHANGE"][n] = pct_change
+            columns["TRADES"][n] = trades
+            columns["VOLUME"][n] = volume
+            columns["VALUE"][n] = value
+            n += 1
             
             print(f"✅ Parsed: {company}")
             i += 11  # Move to next record
             
-        except (ValueError, IndexError) as e:
+        except (ValueError, IndexError, OverflowError) as e:
             # Try to find next company name to resync
             company_name = lines[i] if i < len(lines) else 'EOF'
             print(f"⚠️ Skip starting at line {i + 1}: {company_name[:20]}... — {e}")
@@ -110,7 +208,7 @@ def parse_pdf_text(text):
                 # Check if this looks like a company name (alphabetic, possibly with numbers at end)
                 if (len(potential_company) > 2 and 
                     potential_company.replace('REIT', '').replace('ETF', '').isalpha() and
-                    not any(pattern in potential_company.upper() for pattern in skip_patterns)):
+                    not any(pattern in potential_company.upper() for pattern in SKIP_PATTERNS)):
                     print(f"🔄 Resyncing at line {j + 1}: {potential_company}")
                     i = j
                     found_next = True
@@ -123,10 +221,44 @@ def parse_pdf_text(text):
     if skipped_companies:
         print(f"\n⚠️ Skipped companies due to data alignment issues: {', '.join(skipped_companies)}")
     
-    return pd.DataFrame(data)
+    return pd.DataFrame({name: col[:n] for name, col in columns.items()})
+
+def date_from_filename(filename):
+    date_str = filename.replace("GTI Daily Price List- ", "").replace(".pdf", "").strip()
+    try:
+        date_obj = datetime.strptime(date_str, "%A_%B %dth %Y")
+    except:
+        try:
+            date_obj = datetime.strptime(date_str, "%A_%B %d %Y")
+        except:
+            return None
+    return date_obj.strftime("%Y-%m-%d")
+
+def _extract_and_parse(pdf_path):
+    # May run in a worker process; returns the parsed frame, the parser's log
+    # output (printed by the caller under the file's header) and a text
+    # preview for PDFs that yield no records
+    log = io.StringIO()
+    with redirect_stdout(log):
+        text = cached_text_from_pdf(pdf_path)
+        df = parse_pdf_text(text)
+    preview = text.strip().splitlines()[:30] if df.empty else None
+    return df, log.getvalue(), preview
+
+def _parquet_is_current():
+    # The CSV is the tracked source of truth; the Parquet side file is only
+    # trusted when it was written at or after the CSV's last change
+    if not os.path.exists(MASTER_PARQUET):
+        return False
+    if not os.path.exists(MASTER_CSV):
+        return True
+    return os.path.getmtime(MASTER_PARQUET) >= os.path.getmtime(MASTER_CSV)
 
 def update_master_csv():
-    if os.path.exists(MASTER_CSV):
+    if _parquet_is_current():
+        print("📄 Master Parquet up to date — loading existing data.")
+        master_df = pd.read_parquet(MASTER_PARQUET)
+    elif os.path.exists(MASTER_CSV):
         print("📄 Master CSV found — loading existing data.")
         master_df = pd.read_csv(MASTER_CSV)
     else:
@@ -134,48 +266,61 @@ def update_master_csv():
         master_df = pd.DataFrame()
 
     processed_dates = master_df.get("DATE", pd.Series()).dropna().unique()
+    frames = [master_df] if not master_df.empty else []
 
     print("📂 Looking in:", PDF_FOLDER)
+    pending = []
     for filename in os.listdir(PDF_FOLDER):
         if not filename.lower().endswith(".pdf"):
             continue
 
-        pdf_path = os.path.join(PDF_FOLDER, filename)
-        print(f"\n📦 Processing: {filename}")
+        # Extract date from filename before paying for text extraction
+        date_fmt = date_from_filename(filename)
+        if date_fmt is None:
+            print(f"❌ Skipping: {filename} — Date parse error")
+            continue
 
-        text = extract_text_from_pdf(pdf_path)
-        df = parse_pdf_text(text)
+        if date_fmt in processed_dates:
+            print(f"✅ Already added: {date_fmt}")
+            continue
+
+        pending.append((filename, date_fmt))
+
+    # PDF extraction and parsing are CPU-bound and independent per file. A
+    # single file (the usual daily run) isn't worth spawning a process for.
+    pdf_paths = [os.path.join(PDF_FOLDER, filename) for filename, _ in pending]
+    if len(pdf_paths) > 1:
+        workers = min(len(pdf_paths), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_extract_and_parse, pdf_paths))
+    else:
+        results = [_extract_and_parse(path) for path in pdf_paths]
+
+    for (filename, date_fmt), (df, log, preview) in zip(pending, results):
+        print(f"\n📦 Processing: {filename}")
+        print(log, end="")
 
         if df.empty:
             print(f"❌ No data extracted from {filename}")
             print("🔍 Showing preview of extracted text:")
-            for i, line in enumerate(text.strip().splitlines()):
+            for i, line in enumerate(preview):
                 print(f"{i+1:02d}: {line}")
-                if i >= 29:
-                    break
-            continue
-
-        # Extract date from filename
-        date_str = filename.replace("GTI Daily Price List- ", "").replace(".pdf", "").strip()
-        try:
-            date_obj = datetime.strptime(date_str, "%A_%B %dth %Y")
-        except:
-            try:
-                date_obj = datetime.strptime(date_str, "%A_%B %d %Y")
-            except:
-                print(f"❌ Skipping: {filename} — Date parse error")
-                continue
-
-        date_fmt = date_obj.strftime("%Y-%m-%d")
-        if date_fmt in processed_dates:
-            print(f"✅ Already added: {date_fmt}")
             continue
 
         df["DATE"] = date_fmt
-        master_df = pd.concat([master_df, df], ignore_index=True)
+        frames.append(df)
         print(f"✅ Added: {filename} with {len(df)} records")
 
+    if frames:
+        master_df = pd.concat(frames, ignore_index=True)
+
+    # Tickers repeat every trading day; store them dictionary-encoded so the
+    # Parquet master loads back as a categorical column
+    ticker_cols = [col for col in ("COMPANY", "SYMBOL") if col in master_df.columns]
+    master_df = master_df.astype({col: "category" for col in ticker_cols})
+
     master_df.to_csv(MASTER_CSV, index=False)
+    master_df.to_parquet(MASTER_PARQUET, compression="zstd", index=False)
     print(f"\n✅ Master CSV updated! Total records: {len(master_df)}")
 
 if __name__ == "__main__":